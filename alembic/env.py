@@ -5,17 +5,16 @@
 
 import asyncio
 from logging.config import fileConfig
-from typing import Any
+from typing import Any, Optional
 
-from sqlalchemy import pool
+from sqlalchemy import MetaData, pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 
-# 导入应用配置和模型
+# 导入应用配置（模型按需在 _load_target_metadata 中导入）
 from app.core.config import settings
-from app.features.storage.models import FileRecord  # 导入所有模型以确保元数据完整
 
 # Alembic Config 对象，提供对 .ini 文件中值的访问
 config = context.config
@@ -24,10 +23,37 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-# 添加模型的元数据对象以支持 'autogenerate'
-# 从 SQLModel 导入元数据
-from sqlmodel import SQLModel
-target_metadata = SQLModel.metadata
+
+def _load_target_metadata() -> Optional[MetaData]:
+    """按需加载模型元数据
+    
+    只有 autogenerate 和 check 需要对比模型元数据；
+    命令行执行 upgrade/downgrade 等命令时跳过模型导入，
+    避免构建与迁移无关的 Pydantic 模型。
+    应用内以编程方式调用时（cmd_opts 为空）模型已导入，直接返回元数据。
+    
+    Returns:
+        Optional[MetaData]: SQLModel 元数据，不需要时返回 None
+    """
+    cmd_opts = config.cmd_opts
+    if cmd_opts is not None:
+        command_fn = getattr(cmd_opts, "cmd", (None,))[0]
+        needs_metadata = getattr(cmd_opts, "autogenerate", False) or (
+            getattr(command_fn, "__name__", None) == "check"
+        )
+        if not needs_metadata:
+            return None
+    
+    # 添加模型的元数据对象以支持 'autogenerate'
+    # 从 SQLModel 导入元数据
+    from sqlmodel import SQLModel
+    
+    from app.features.storage.models import FileRecord  # noqa: F401 导入所有模型以确保元数据完整
+    
+    return SQLModel.metadata
+
+
+target_metadata = _load_target_metadata()
 
 # 其他从 env.py 需要的值，由需要访问脚本的值定义
 # my_important_option = config.get_main_option("my_important_option")
@@ -84,8 +110,8 @@ def do_run_migrations(connection: Connection) -> None:
         compare_type=True,
         # 比较服务器默认值
         compare_server_default=True,
-        # 渲染项目以便在迁移中包含批处理操作
-        render_as_batch=True,
+        # 批处理模式仅用于 SQLite 的 ALTER 限制，PostgreSQL 直接使用 ALTER TABLE
+        render_as_batch=connection.dialect.name == "sqlite",
     )
 
     with context.begin_transaction():
@@ -116,9 +142,14 @@ async def run_async_migrations() -> None:
 def run_migrations_online() -> None:
     """在 'online' 模式下运行迁移
     
-    在这种情况下，我们需要创建一个 Engine
-    并将连接与上下文关联
+    应用启动时会通过 config.attributes 传入其引擎的连接，直接复用；
+    命令行单独运行时才创建新的 Engine 并将连接与上下文关联
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
+    
     # 运行异步迁移
     asyncio.run(run_async_migrations())
 
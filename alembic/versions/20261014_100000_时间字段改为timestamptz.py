@@ -0,0 +1,41 @@
+"""时间字段改为timestamptz
+
+Revision ID: 20261014_100000
+Revises: 20250827_104954
+Create Date: 2026-10-14 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '20261014_100000'
+down_revision: Union[str, None] = '20250827_104954'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """将created_at和updated_at改为带时区的时间戳，已有数据按UTC解释"""
+    for column in ('created_at', 'updated_at'):
+        op.alter_column(
+            'file_records',
+            column,
+            type_=sa.DateTime(timezone=True),
+            existing_type=sa.DateTime(),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
+
+
+def downgrade() -> None:
+    """恢复为不带时区的时间戳，数据转换为UTC时间"""
+    for column in ('created_at', 'updated_at'):
+        op.alter_column(
+            'file_records',
+            column,
+            type_=sa.DateTime(),
+            existing_type=sa.DateTime(timezone=True),
+            postgresql_using=f"{column} AT TIME ZONE 'UTC'",
+        )
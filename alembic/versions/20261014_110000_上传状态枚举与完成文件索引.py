@@ -0,0 +1,64 @@
+"""上传状态枚举与完成文件索引
+
+Revision ID: 20261014_110000
+Revises: 20261014_100000
+Create Date: 2026-10-14 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '20261014_110000'
+down_revision: Union[str, None] = '20261014_100000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+upload_status_enum = postgresql.ENUM(
+    'pending', 'completed', 'failed', name='upload_status'
+)
+
+
+def upgrade() -> None:
+    """upload_status改为枚举类型，并为已完成文件创建部分索引"""
+    upload_status_enum.create(op.get_bind(), checkfirst=True)
+    
+    # 默认值依赖原列类型，需先移除再转换
+    op.alter_column('file_records', 'upload_status', server_default=None)
+    op.alter_column(
+        'file_records',
+        'upload_status',
+        type_=upload_status_enum,
+        existing_type=sa.String(length=20),
+        existing_nullable=False,
+        postgresql_using='upload_status::upload_status',
+    )
+    op.alter_column('file_records', 'upload_status', server_default='pending')
+    
+    op.create_index(
+        'ix_file_records_completed',
+        'file_records',
+        ['id'],
+        postgresql_where=sa.text("upload_status = 'completed'"),
+    )
+
+
+def downgrade() -> None:
+    """删除部分索引，upload_status恢复为字符串类型"""
+    op.drop_index('ix_file_records_completed', table_name='file_records')
+    
+    op.alter_column('file_records', 'upload_status', server_default=None)
+    op.alter_column(
+        'file_records',
+        'upload_status',
+        type_=sa.String(length=20),
+        existing_type=upload_status_enum,
+        existing_nullable=False,
+        postgresql_using='upload_status::text',
+    )
+    op.alter_column('file_records', 'upload_status', server_default='pending')
+    
+    upload_status_enum.drop(op.get_bind(), checkfirst=True)
@@ -3,7 +3,7 @@
 处理环境变量读取和Railway URL的异步转换
 """
 
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from typing import Optional
 
 from pydantic import Field, computed_field
@@ -20,7 +20,8 @@ class Settings(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=False,
-        extra="ignore"
+        extra="ignore",
+        frozen=True,  # 配置只读，保证缓存的计算字段不会失效
     )
     
     # 数据库配置
@@ -62,33 +63,51 @@ class Settings(BaseSettings):
     host: str = Field(default="0.0.0.0", description="服务器主机")
     port: int = Field(default=8000, description="服务器端口")
     
+    # 连接池配置：上限为所有worker进程合计，按worker数量分摊到每个进程
+    web_concurrency: int = Field(
+        default=1,
+        ge=1,
+        description="uvicorn worker进程数（WEB_CONCURRENCY）"
+    )
+    db_max_connections: int = Field(
+        default=60,
+        ge=1,
+        description="所有worker合计的数据库最大连接数"
+    )
+    redis_max_connections: int = Field(
+        default=60,
+        ge=1,
+        description="所有worker合计的Redis最大连接数"
+    )
+    
     # 缓存TTL配置（秒）
     cache_ttl_default: int = Field(default=3600, description="默认缓存过期时间")
     cache_ttl_user: int = Field(default=3600, description="用户数据缓存过期时间")
     cache_ttl_file: int = Field(default=1800, description="文件信息缓存过期时间")
     
     @computed_field
-    @property
+    @cached_property
     def async_database_url(self) -> Optional[str]:
         """将Railway的同步PostgreSQL URL转换为异步URL
         
         Railway注入的DATABASE_URL使用postgresql://前缀，
-        但asyncpg需要postgresql+asyncpg://前缀
+        但asyncpg需要postgresql+asyncpg://前缀。
+        结果在实例上缓存，只计算一次
         
         Returns:
             Optional[str]: 异步数据库连接URL，如果未配置则返回None
         """
-        if not self.database_url:
+        url = self.database_url
+        if not url:
             return None
         
-        if self.database_url.startswith("postgresql://"):
-            return self.database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
-        elif self.database_url.startswith("postgres://"):
-            return self.database_url.replace("postgres://", "postgresql+asyncpg://", 1)
-        return self.database_url
+        for prefix in ("postgresql://", "postgres://"):
+            if url.startswith(prefix):
+                return "postgresql+asyncpg://" + url[len(prefix):]
+        return url
     
     @computed_field
-    @property
+    @cached_property
     def async_redis_url(self) -> Optional[str]:
         """处理Redis URL确保兼容性
         
@@ -105,7 +124,39 @@ class Settings(BaseSettings):
         return self.redis_url
     
     @computed_field
-    @property
+    @cached_property
+    def db_pool_size(self) -> int:
+        """单个worker的数据库连接池常驻连接数
+        
+        每个worker分得的连接数中1/3作为常驻连接，其余作为溢出连接
+        
+        Returns:
+            int: 常驻连接数
+        """
+        return max(1, self.db_max_connections // self.web_concurrency // 3)
+    
+    @computed_field
+    @cached_property
+    def db_max_overflow(self) -> int:
+        """单个worker的数据库连接池溢出连接数
+        
+        Returns:
+            int: 溢出连接数
+        """
+        return max(0, self.db_max_connections // self.web_concurrency - self.db_pool_size)
+    
+    @computed_field
+    @cached_property
+    def redis_pool_max_connections(self) -> int:
+        """单个worker的Redis连接池最大连接数
+        
+        Returns:
+            int: 最大连接数
+        """
+        return max(1, self.redis_max_connections // self.web_concurrency)
+    
+    @computed_field
+    @cached_property
     def r2_config(self) -> Optional[dict[str, str]]:
         """Cloudflare R2配置字典
         
@@ -3,12 +3,14 @@
 提供SQLAlchemy异步数据库连接和会话管理
 """
 
-import asyncio
+from functools import lru_cache
 from typing import AsyncGenerator
 
 from alembic import command
 from alembic.config import Config
 from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -19,6 +21,22 @@ from sqlmodel import SQLModel
 from .config import settings
 
 
+# 迁移使用的PostgreSQL事务级咨询锁键，多个worker同时启动时串行执行迁移
+_MIGRATION_LOCK_KEY = 7_252_940_131
+
+
+@lru_cache(maxsize=1)
+def _alembic_config() -> Config:
+    """获取 Alembic 配置
+    
+    alembic.ini 只解析一次，后续迁移复用同一配置对象
+    
+    Returns:
+        Config: Alembic 配置
+    """
+    return Config("alembic.ini")
+
+
 class DatabaseManager:
     """数据库管理器
     
@@ -33,6 +51,7 @@ class DatabaseManager:
         """
         self.engine = None
         self.async_session = None
+        self.readonly_session = None
         
         if not settings.async_database_url:
             logger.warning("数据库URL未配置，跳过数据库初始化")
@@ -41,21 +60,41 @@ class DatabaseManager:
         self.engine = create_async_engine(
             settings.async_database_url,
             echo=settings.debug,  # 调试模式下打印SQL语句
-            pool_size=10,  # 连接池大小
-            max_overflow=20,  # 最大溢出连接数
-            pool_pre_ping=True,  # 连接前ping检查
-            pool_recycle=3600,  # 连接回收时间（秒）
+            pool_size=settings.db_pool_size,  # 连接池大小，按worker数量分摊
+            max_overflow=settings.db_max_overflow,  # 最大溢出连接数
+            pool_pre_ping=False,  # 不在每次取连接时额外执行ping，依靠定期回收淘汰失效连接
+            pool_recycle=1800,  # 连接回收时间（秒）
+            pool_timeout=10,  # 获取连接的等待超时（秒）
+            pool_use_lifo=True,  # 优先复用最近使用的连接，保持热连接
+            query_cache_size=1200,  # SQL编译缓存大小
+            connect_args={
+                "prepared_statement_cache_size": 500,  # SQLAlchemy侧预编译语句缓存
+                "statement_cache_size": 500,  # asyncpg语句缓存
+                "server_settings": {"jit": "off"},  # 短查询关闭JIT，避免规划开销
+            },
         )
         
         self.async_session = async_sessionmaker(
             bind=self.engine,
             class_=AsyncSession,
             expire_on_commit=False,  # 提交后不过期对象
-            autoflush=True,  # 自动刷新
+            autoflush=False,  # 关闭自动刷新，写操作在提交前显式flush
             autocommit=False,  # 手动提交
         )
         
-        logger.info(f"数据库引擎已初始化: {settings.async_database_url.split('@')[1] if '@' in settings.async_database_url else 'localhost'}")
+        # 只读会话工厂，用于纯查询的接口
+        self.readonly_session = async_sessionmaker(
+            bind=self.engine.execution_options(postgresql_readonly=True),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+            autocommit=False,
+        )
+        
+        # 只记录主机部分，不输出URL中的账号密码
+        _, sep, host = settings.async_database_url.rpartition("@")
+        host = host if sep else "localhost"
+        logger.info(f"数据库引擎已初始化: {host}")
     
     async def run_migrations(self) -> None:
         """运行数据库迁移
@@ -68,23 +107,31 @@ class DatabaseManager:
             return
         
         try:
-            # 在单独的线程中运行 Alembic 迁移，因为 Alembic 是同步的
-            await asyncio.get_event_loop().run_in_executor(
-                None, self._run_alembic_upgrade
-            )
+            # 复用应用引擎的连接运行 Alembic，避免迁移再单独建立一次数据库连接
+            async with self.engine.begin() as connection:
+                await connection.run_sync(self._run_alembic_upgrade)
             logger.info("数据库迁移完成")
         except Exception as e:
             logger.error(f"数据库迁移失败: {e}")
             raise
     
-    def _run_alembic_upgrade(self) -> None:
-        """在执行器中运行 Alembic 升级
+    def _run_alembic_upgrade(self, connection: Connection) -> None:
+        """在同步连接上运行 Alembic 升级
+        
+        通过 run_sync 调用，连接经由 config.attributes 传给 alembic/env.py
         
-        这个方法在单独的线程中运行，避免阻塞异步事件循环
+        Args:
+            connection: 应用引擎提供的同步连接
         """
+        alembic_cfg = _alembic_config()
+        alembic_cfg.attributes["connection"] = connection
         try:
-            # 创建 Alembic 配置
-            alembic_cfg = Config("alembic.ini")
+            # 后获得锁的worker看到已是最新版本，升级直接返回
+            if connection.dialect.name == "postgresql":
+                connection.execute(
+                    text("SELECT pg_advisory_xact_lock(:key)"),
+                    {"key": _MIGRATION_LOCK_KEY}
+                )
             
             # 运行迁移到最新版本
             command.upgrade(alembic_cfg, "head")
@@ -92,6 +139,9 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Alembic 升级失败: {e}")
             raise
+        finally:
+            # 配置对象会被复用，不保留已关闭的连接
+            alembic_cfg.attributes.pop("connection", None)
     
     async def create_tables_fallback(self) -> None:
         """备用的表创建方法
@@ -121,30 +171,6 @@ class DatabaseManager:
             logger.info("数据库连接已关闭")
         else:
             logger.info("数据库未初始化，无需关闭")
-    
-    async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
-        """获取数据库会话
-        
-        用作FastAPI依赖注入，自动管理会话生命周期
-        
-        Yields:
-            AsyncSession: 数据库会话
-        
-        Raises:
-            RuntimeError: 当数据库未初始化时抛出
-        """
-        if not self.async_session:
-            raise RuntimeError("数据库未初始化，无法获取会话")
-        
-        async with self.async_session() as session:
-            try:
-                yield session
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"数据库会话错误: {e}")
-                raise
-            finally:
-                await session.close()
 
 
 # 全局数据库管理器实例
@@ -152,6 +178,7 @@ db_manager = DatabaseManager()
 
 
 # FastAPI依赖注入函数
+# 直接在依赖中管理会话上下文，不额外嵌套异步生成器
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """获取数据库会话的依赖注入函数
     
@@ -159,6 +186,40 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     
     Yields:
         AsyncSession: 数据库会话
+    
+    Raises:
+        RuntimeError: 当数据库未初始化时抛出
+    """
+    if not db_manager.async_session:
+        raise RuntimeError("数据库未初始化，无法获取会话")
+    
+    async with db_manager.async_session() as session:
+        try:
+            yield session
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"数据库会话错误: {e}")
+            raise
+
+
+async def get_db_readonly() -> AsyncGenerator[AsyncSession, None]:
+    """获取只读数据库会话的依赖注入函数
+    
+    用于只查询不写入的路由: db: AsyncSession = Depends(get_db_readonly)
+    
+    Yields:
+        AsyncSession: 只读数据库会话
+    
+    Raises:
+        RuntimeError: 当数据库未初始化时抛出
     """
-    async for session in db_manager.get_session():
-        yield session
\ No newline at end of file
+    if not db_manager.readonly_session:
+        raise RuntimeError("数据库未初始化，无法获取会话")
+    
+    async with db_manager.readonly_session() as session:
+        try:
+            yield session
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"数据库会话错误: {e}")
+            raise
@@ -3,16 +3,32 @@
 提供Redis异步连接池和缓存操作
 """
 
-import json
-from datetime import datetime
+import hashlib
+import socket
 from typing import Any, Optional, Union
 
+import orjson
 import redis.asyncio as redis
 from loguru import logger
 
 from .config import settings
 
 
+# 缓存键中可直接使用原始参数的最大长度，超过则改用哈希
+_MAX_RAW_ARGS_LENGTH = 64
+
+# TCP keepalive参数（秒/次数），仅设置当前平台支持的选项
+_KEEPALIVE_OPTIONS = {
+    option: value
+    for name, value in (
+        ("TCP_KEEPIDLE", 60),
+        ("TCP_KEEPINTVL", 30),
+        ("TCP_KEEPCNT", 3),
+    )
+    if (option := getattr(socket, name, None)) is not None
+}
+
+
 class RedisManager:
     """Redis管理器
     
@@ -34,17 +50,17 @@ class RedisManager:
         
         self.redis_pool = redis.ConnectionPool.from_url(
             settings.async_redis_url,
-            max_connections=20,  # 最大连接数
+            max_connections=settings.redis_pool_max_connections,  # 最大连接数，按worker数量分摊
             retry_on_timeout=True,  # 超时重试
+            socket_timeout=2.0,  # 读写超时（秒）
+            socket_connect_timeout=1.0,  # 建立连接超时（秒）
             socket_keepalive=True,  # 保持连接
-            socket_keepalive_options={},
+            socket_keepalive_options=_KEEPALIVE_OPTIONS,
             health_check_interval=30,  # 健康检查间隔（秒）
         )
         
-        self.redis_client = redis.Redis(
-            connection_pool=self.redis_pool,
-            decode_responses=True,  # 自动解码响应
-        )
+        # 不启用decode_responses，直接以bytes交给orjson解析
+        self.redis_client = redis.Redis(connection_pool=self.redis_pool)
         
         logger.info("Redis连接池已初始化")
     
@@ -76,43 +92,41 @@ class RedisManager:
         else:
             logger.info("Redis未初始化，无需关闭")
     
-    def _serialize_value(self, value: Any) -> str:
-        """序列化值为JSON字符串
+    def _serialize_value(self, value: Any) -> bytes:
+        """序列化值为JSON字节串
         
-        处理datetime等特殊类型的序列化
+        使用orjson序列化，原生支持datetime等特殊类型
         
         Args:
             value: 要序列化的值
             
         Returns:
-            str: JSON字符串
+            bytes: JSON字节串
         """
-        def json_serializer(obj: Any) -> str:
-            """JSON序列化器，处理特殊类型"""
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
-        
-        return json.dumps(value, default=json_serializer, ensure_ascii=False)
+        return orjson.dumps(
+            value, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+        )
     
-    def _deserialize_value(self, value: str) -> Any:
-        """反序列化JSON字符串为Python对象
+    def _deserialize_value(self, value: bytes) -> Any:
+        """反序列化JSON字节串为Python对象
         
         Args:
-            value: JSON字符串
+            value: JSON字节串
             
         Returns:
-            Any: Python对象
+            Any: Python对象，非JSON内容按原始字符串返回
         """
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return value
+            return orjson.loads(value)
+        except (orjson.JSONDecodeError, TypeError):
+            return value.decode() if isinstance(value, bytes) else value
     
     def _build_key(self, module: str, function: str, *args: Any) -> str:
         """构建缓存键名
         
-        格式: taible:module:function:参数哈希
+        格式: taible:module:function:参数 或 taible:module:function:#参数哈希
+        参数拼接后不超过64个字符、仅含ASCII且不含空白和#时直接作为键名的一部分，
+        否则使用参数哈希；哈希键以#开头，与直接嵌入参数的键不会重合
         
         Args:
             module: 模块名
@@ -122,13 +136,20 @@ class RedisManager:
         Returns:
             str: 缓存键名
         """
-        import hashlib
+        args_str = str(args[0]) if len(args) == 1 else ":".join(map(str, args))
         
-        # 创建参数哈希
-        args_str = ":".join(str(arg) for arg in args)
-        args_hash = hashlib.md5(args_str.encode()).hexdigest()[:8]
+        # 短参数直接嵌入键名，省去哈希计算，也便于排查
+        if (
+            len(args_str) <= _MAX_RAW_ARGS_LENGTH
+            and args_str.isascii()
+            and not any(c in args_str for c in " \t\r\n#")
+        ):
+            return f"taible:{module}:{function}:{args_str}"
         
-        return f"taible:{module}:{function}:{args_hash}"
+        # 创建参数哈希（blake2b直接输出4字节摘要，即8位十六进制）
+        args_hash = hashlib.blake2b(args_str.encode(), digest_size=4).hexdigest()
+        
+        return f"taible:{module}:{function}:#{args_hash}"
     
     async def get(self, key: str) -> Optional[Any]:
         """获取缓存值
@@ -152,6 +173,34 @@ class RedisManager:
             logger.error(f"Redis获取缓存失败 {key}: {e}")
             return None
     
+    async def mget(self, keys: list[str]) -> list[Optional[Any]]:
+        """批量获取缓存值
+        
+        使用单次MGET命令获取多个键，避免逐个请求的网络往返
+        
+        Args:
+            keys: 缓存键列表
+            
+        Returns:
+            list[Optional[Any]]: 与keys一一对应的缓存值，不存在的位置为None
+        """
+        if not keys:
+            return []
+        
+        if not self.redis_client:
+            logger.debug(f"Redis未初始化，跳过批量获取缓存: {len(keys)}个键")
+            return [None] * len(keys)
+        
+        try:
+            values = await self.redis_client.mget(keys)
+            return [
+                None if value is None else self._deserialize_value(value)
+                for value in values
+            ]
+        except Exception as e:
+            logger.error(f"Redis批量获取缓存失败 {len(keys)}个键: {e}")
+            return [None] * len(keys)
+    
     async def set(
         self, 
         key: str, 
@@ -284,11 +333,14 @@ def cache_result(module: str, ttl: Optional[int] = None):
     """
     def decorator(func):
         async def wrapper(*args, **kwargs):
-            # 检查缓存
-            cached_result = await redis_manager.get_cached_function_result(
+            # 键名只构建一次，读取和写入共用
+            key = redis_manager._build_key(
                 module, func.__name__, *args, *kwargs.values()
             )
             
+            # 检查缓存
+            cached_result = await redis_manager.get(key)
+            
             if cached_result is not None:
                 logger.debug(f"缓存命中: {module}.{func.__name__}")
                 return cached_result
@@ -297,9 +349,7 @@ def cache_result(module: str, ttl: Optional[int] = None):
             result = await func(*args, **kwargs)
             
             # 缓存结果
-            await redis_manager.cache_function_result(
-                module, func.__name__, result, ttl, *args, *kwargs.values()
-            )
+            await redis_manager.set(key, result, ttl or settings.cache_ttl_default)
             
             logger.debug(f"缓存已更新: {module}.{func.__name__}")
             return result
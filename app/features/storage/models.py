@@ -3,12 +3,23 @@
 定义文件上传相关的数据模型
 """
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Literal, Optional, get_args
 
+from sqlalchemy import DateTime, Enum, Index, text
 from sqlmodel import Field, SQLModel
 
 
+# 上传状态取值，对应数据库中的upload_status枚举类型
+UploadStatus = Literal["pending", "completed", "failed"]
+UPLOAD_STATUSES: tuple[str, ...] = get_args(UploadStatus)
+
+
+def _utcnow() -> datetime:
+    """返回带UTC时区的当前时间"""
+    return datetime.now(timezone.utc)
+
+
 class FileRecord(SQLModel, table=True):
     """文件记录表
     
@@ -16,6 +27,14 @@ class FileRecord(SQLModel, table=True):
     """
     
     __tablename__ = "file_records"
+    __table_args__ = (
+        # 仅索引已完成的文件，供按状态筛选的查询使用
+        Index(
+            "ix_file_records_completed",
+            "id",
+            postgresql_where=text("upload_status = 'completed'"),
+        ),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True, description="文件记录ID")
     filename: str = Field(max_length=255, description="原始文件名")
@@ -25,16 +44,19 @@ class FileRecord(SQLModel, table=True):
     upload_status: str = Field(
         default="pending", 
         max_length=20, 
+        sa_type=Enum(*UPLOAD_STATUSES, name="upload_status"),
         description="上传状态: pending, completed, failed"
     )
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="创建时间")
-    updated_at: Optional[datetime] = Field(default=None, description="更新时间")
-    
-    class Config:
-        """模型配置"""
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    created_at: datetime = Field(
+        default_factory=_utcnow,
+        sa_type=DateTime(timezone=True),
+        description="创建时间"
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_type=DateTime(timezone=True),
+        description="更新时间"
+    )
 
 
 class FileRecordCreate(SQLModel):
@@ -61,8 +83,14 @@ class FileRecordRead(SQLModel):
 class FileRecordUpdate(SQLModel):
     """更新文件记录的请求模型"""
     
-    upload_status: Optional[str] = Field(default=None, description="上传状态")
-    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow, description="更新时间")
+    upload_status: Optional[UploadStatus] = Field(
+        default=None,
+        description="上传状态: pending, completed, failed"
+    )
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        description="更新时间，未提供时由服务端在更新时填充"
+    )
 
 
 class PresignedUrlRequest(SQLModel):
@@ -73,10 +101,22 @@ class PresignedUrlRequest(SQLModel):
     file_size: int = Field(gt=0, le=100*1024*1024, description="文件大小（字节），最大100MB")
 
 
+class PresignedUrlBatchRequest(SQLModel):
+    """批量预签名URL请求模型"""
+    
+    files: list[PresignedUrlRequest] = Field(
+        min_length=1,
+        max_length=100,
+        description="待上传的文件列表，单次最多100个"
+    )
+
+
 class PresignedUrlResponse(SQLModel):
     """预签名URL响应模型"""
     
     upload_url: str = Field(description="预签名上传URL")
     file_key: str = Field(description="文件存储键名")
     expires_in: int = Field(description="URL过期时间（秒）")
-    file_record_id: int = Field(description="文件记录ID")
\ No newline at end of file
+    file_record_id: int = Field(description="文件记录ID")
+    content_type: str = Field(description="文件MIME类型，上传时须使用相同的Content-Type")
+    file_size: int = Field(description="文件大小（字节）")
\ No newline at end of file
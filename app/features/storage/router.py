@@ -9,12 +9,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.shared.schemas import APIResponse
+from app.core.database import get_db, get_db_readonly
+from app.shared.schemas import APIResponse, build_mapper
 
 from .models import (
     FileRecordRead,
     FileRecordUpdate,
+    PresignedUrlBatchRequest,
     PresignedUrlRequest,
     PresignedUrlResponse,
 )
@@ -24,6 +25,10 @@ from .service import storage_service
 router = APIRouter()
 
 
+# 数据库记录到响应模型的转换函数，数据可信，直接构造
+_to_read = build_mapper(FileRecordRead)
+
+
 @router.post(
     "/presigned-upload-url",
     response_model=APIResponse[PresignedUrlResponse],
@@ -53,11 +58,9 @@ async def get_presigned_upload_url(
         
         response = await storage_service.create_presigned_upload_request(db, request)
         
-        return APIResponse(
-            success=True,
+        return APIResponse.ok(
             data=response,
-            message="预签名上传URL生成成功",
-            code=200
+            message="预签名上传URL生成成功"
         )
         
     except Exception as e:
@@ -68,6 +71,46 @@ async def get_presigned_upload_url(
         )
 
 
+@router.post(
+    "/presigned-urls:batch",
+    response_model=APIResponse[list[PresignedUrlResponse]],
+    summary="批量获取预签名上传URL",
+    description="一次请求为多个文件创建记录并生成预签名上传URL，结果顺序与请求一致"
+)
+async def get_presigned_upload_urls_batch(
+    request: PresignedUrlBatchRequest,
+    db: AsyncSession = Depends(get_db)
+) -> APIResponse[list[PresignedUrlResponse]]:
+    """批量获取预签名上传URL
+    
+    Args:
+        request: 批量预签名URL请求数据
+        db: 数据库会话
+        
+    Returns:
+        APIResponse[list[PresignedUrlResponse]]: 包含预签名URL列表的响应
+        
+    Raises:
+        HTTPException: 当生成预签名URL失败时
+    """
+    try:
+        logger.info(f"请求批量预签名上传URL: {len(request.files)}个文件")
+        
+        responses = await storage_service.create_presigned_upload_requests(db, request)
+        
+        return APIResponse.ok(
+            data=responses,
+            message="批量预签名上传URL生成成功"
+        )
+        
+    except Exception as e:
+        logger.error(f"批量生成预签名上传URL失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"批量生成预签名上传URL失败: {str(e)}"
+        )
+
+
 @router.get(
     "/files/{file_id}",
     response_model=APIResponse[FileRecordRead],
@@ -76,7 +119,7 @@ async def get_presigned_upload_url(
 )
 async def get_file_record(
     file_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ) -> APIResponse[FileRecordRead]:
     """获取文件记录
     
@@ -91,7 +134,7 @@ async def get_file_record(
         HTTPException: 当文件不存在时
     """
     try:
-        file_record = await storage_service.get_file_record(db, file_id)
+        file_record = await storage_service.get_file_record_projection(db, file_id)
         
         if not file_record:
             raise HTTPException(
@@ -99,11 +142,9 @@ async def get_file_record(
                 detail=f"文件记录不存在: {file_id}"
             )
         
-        return APIResponse(
-            success=True,
-            data=FileRecordRead.model_validate(file_record),
-            message="获取文件记录成功",
-            code=200
+        return APIResponse.ok(
+            data=file_record,
+            message="获取文件记录成功"
         )
         
     except HTTPException:
@@ -151,11 +192,9 @@ async def update_file_record(
                 detail=f"文件记录不存在: {file_id}"
             )
         
-        return APIResponse(
-            success=True,
-            data=FileRecordRead.model_validate(updated_record),
-            message="文件记录更新成功",
-            code=200
+        return APIResponse.ok(
+            data=_to_read(updated_record),
+            message="文件记录更新成功"
         )
         
     except HTTPException:
@@ -176,7 +215,7 @@ async def update_file_record(
 )
 async def get_file_download_url(
     file_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_readonly)
 ) -> APIResponse[Dict[str, Any]]:
     """获取文件下载URL
     
@@ -191,7 +230,7 @@ async def get_file_download_url(
         HTTPException: 当文件不存在时
     """
     try:
-        file_record = await storage_service.get_file_record(db, file_id)
+        file_record = await storage_service.get_file_download_info(db, file_id)
         
         if not file_record:
             raise HTTPException(
@@ -209,15 +248,13 @@ async def get_file_download_url(
             file_record.file_key
         )
         
-        return APIResponse(
-            success=True,
+        return APIResponse.ok(
             data={
                 "download_url": download_url,
                 "filename": file_record.filename,
                 "expires_in": 3600
             },
-            message="下载URL生成成功",
-            code=200
+            message="下载URL生成成功"
         )
         
     except HTTPException:
@@ -266,11 +303,9 @@ async def mark_upload_complete(
         
         logger.info(f"文件上传已完成: {file_id} - {updated_record.filename}")
         
-        return APIResponse(
-            success=True,
-            data=FileRecordRead.model_validate(updated_record),
-            message="文件上传完成",
-            code=200
+        return APIResponse.ok(
+            data=_to_read(updated_record),
+            message="文件上传完成"
         )
         
     except HTTPException:
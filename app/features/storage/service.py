@@ -3,38 +3,327 @@
 提供Cloudflare R2对象存储操作和预签名URL生成
 """
 
+import asyncio
+import hashlib
+import hmac
+import re
+import time
 import uuid
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from urllib.parse import SplitResult, quote, urlsplit
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 from loguru import logger
+from sqlalchemy import Row, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from app.core.config import settings
-from app.core.redis import cache_result, redis_manager
 
 from .models import (
     FileRecord,
     FileRecordCreate,
+    FileRecordRead,
     FileRecordUpdate,
+    PresignedUrlBatchRequest,
     PresignedUrlRequest,
     PresignedUrlResponse,
 )
 
 
+# FileRecordRead对应的查询列
+_FILE_RECORD_READ_COLUMNS = tuple(
+    getattr(FileRecord, name) for name in FileRecordRead.model_fields
+)
+
+
+class _SigV4Presigner:
+    """S3 SigV4查询参数签名器
+    
+    直接用hmac/hashlib生成预签名URL，不经过botocore的端点解析和事件系统。
+    使用路径风格URL: {endpoint}/{bucket}/{key}
+    """
+    
+    _ALGORITHM = "AWS4-HMAC-SHA256"
+    _SERVICE = "s3"
+    _DEFAULT_PORTS = {"http": 80, "https": 443}
+    
+    def __init__(
+        self,
+        endpoint_url: Optional[str],
+        bucket_name: str,
+        region_name: str,
+        access_key_id: Optional[str],
+        secret_access_key: Optional[str],
+    ) -> None:
+        """初始化签名器
+        
+        Args:
+            endpoint_url: R2端点URL
+            bucket_name: 存储桶名称
+            region_name: 区域名称
+            access_key_id: 访问密钥ID
+            secret_access_key: 秘密访问密钥
+        """
+        self.bucket_name = bucket_name
+        self.region_name = region_name
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        
+        # 预先计算签名用的Host头和URL前缀
+        if endpoint_url:
+            parts = urlsplit(endpoint_url)
+            self.host = self._canonical_host(parts)
+            self._base_url = f"{parts.scheme}://{parts.netloc}"
+        else:
+            self.host = None
+            self._base_url = None
+        
+        # 派生签名密钥按UTC日期缓存，同一天内只计算一次HMAC链
+        self._signing_key_cache: Optional[tuple[str, bytes]] = None
+    
+    @classmethod
+    def _canonical_host(cls, parts: SplitResult) -> str:
+        """计算签名用的Host头
+        
+        与客户端实际发送的Host头一致：小写、去掉用户信息，默认端口不写出
+        
+        Args:
+            parts: 端点URL的拆分结果
+            
+        Returns:
+            str: Host头的值
+        """
+        host = parts.hostname or ""
+        if ":" in host:
+            host = f"[{host}]"  # IPv6地址
+        if parts.port is not None and parts.port != cls._DEFAULT_PORTS.get(parts.scheme):
+            host = f"{host}:{parts.port}"
+        return host
+    
+    def _signing_key(self, datestamp: str) -> bytes:
+        """获取指定日期的派生签名密钥
+        
+        Args:
+            datestamp: UTC日期，格式YYYYMMDD
+            
+        Returns:
+            bytes: 签名密钥
+        """
+        cached = self._signing_key_cache
+        if cached is not None and cached[0] == datestamp:
+            return cached[1]
+        
+        key = hmac.new(
+            f"AWS4{self.secret_access_key}".encode(), datestamp.encode(), hashlib.sha256
+        ).digest()
+        for part in (self.region_name, self._SERVICE, "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        
+        self._signing_key_cache = (datestamp, key)
+        return key
+    
+    def presign(
+        self,
+        method: str,
+        file_key: str,
+        expires_in: int,
+        content_type: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> str:
+        """生成预签名URL
+        
+        Args:
+            method: HTTP方法，如GET、PUT
+            file_key: 文件存储键名
+            expires_in: URL过期时间（秒）
+            content_type: 需要签入的Content-Type，上传时客户端必须使用相同的值
+            now: 签名时间（Unix时间戳，秒），默认当前时间
+            
+        Returns:
+            str: 预签名URL
+            
+        Raises:
+            NoCredentialsError: 未配置访问密钥
+            ValueError: 未配置R2端点
+        """
+        if not self.access_key_id or not self.secret_access_key:
+            raise NoCredentialsError()
+        if not self.host:
+            raise ValueError("R2端点未配置，无法生成预签名URL")
+        
+        amz_date = time.strftime(
+            "%Y%m%dT%H%M%SZ", time.gmtime(time.time() if now is None else now)
+        )
+        datestamp = amz_date[:8]
+        scope = f"{datestamp}/{self.region_name}/{self._SERVICE}/aws4_request"
+        
+        if content_type is None:
+            signed_headers = "host"
+            canonical_headers = f"host:{self.host}\n"
+        else:
+            # SigV4要求头部值去掉首尾空白并将连续空白合并为一个空格
+            signed_headers = "content-type;host"
+            canonical_headers = (
+                f"content-type:{' '.join(content_type.split())}\nhost:{self.host}\n"
+            )
+        
+        # 参数名已按字典序排列
+        canonical_query = (
+            f"X-Amz-Algorithm={self._ALGORITHM}"
+            f"&X-Amz-Credential={quote(f'{self.access_key_id}/{scope}', safe='-_.~')}"
+            f"&X-Amz-Date={amz_date}"
+            f"&X-Amz-Expires={expires_in}"
+            f"&X-Amz-SignedHeaders={quote(signed_headers, safe='-_.~')}"
+        )
+        canonical_uri = f"/{self.bucket_name}/{quote(file_key, safe='/~')}"
+        canonical_request = (
+            f"{method}\n{canonical_uri}\n{canonical_query}\n"
+            f"{canonical_headers}\n{signed_headers}\nUNSIGNED-PAYLOAD"
+        )
+        string_to_sign = (
+            f"{self._ALGORITHM}\n{amz_date}\n{scope}\n"
+            f"{hashlib.sha256(canonical_request.encode()).hexdigest()}"
+        )
+        signature = hmac.new(
+            self._signing_key(datestamp), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        
+        return (
+            f"{self._base_url}{canonical_uri}?{canonical_query}"
+            f"&X-Amz-Signature={signature}"
+        )
+    
+    def presign_many_puts(
+        self,
+        items: list[tuple[str, str]],
+        expires_in: int,
+    ) -> list[str]:
+        """批量生成预签名上传URL
+        
+        整批共用同一签名时间和派生签名密钥
+        
+        Args:
+            items: (文件存储键名, 文件MIME类型) 列表
+            expires_in: URL过期时间（秒）
+            
+        Returns:
+            list[str]: 与items一一对应的预签名上传URL
+        """
+        now = time.time()
+        return [
+            self.presign("PUT", file_key, expires_in, content_type=content_type, now=now)
+            for file_key, content_type in items
+        ]
+
+
+# S3 DeleteObjects单次请求的最大键数
+_DELETE_BATCH_SIZE = 1000
+
+
+class _DeleteBatcher:
+    """删除请求合并器
+    
+    缓冲零散的单个删除请求，达到最大键数或等待超时后合并为一次批量删除
+    """
+    
+    def __init__(
+        self,
+        flush: Callable[[list[str]], Awaitable[dict[str, bool]]],
+        max_keys: int = _DELETE_BATCH_SIZE,
+        max_delay: float = 0.05,
+    ) -> None:
+        """初始化合并器
+        
+        Args:
+            flush: 批量删除函数，返回每个键是否删除成功
+            max_keys: 单批最大键数
+            max_delay: 最长等待时间（秒）
+        """
+        self._flush = flush
+        self._max_keys = max_keys
+        self._max_delay = max_delay
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.Task] = None
+        # 正在执行的批次任务，保留引用避免被垃圾回收
+        self._inflight: set[asyncio.Task] = set()
+    
+    async def delete(self, file_key: str) -> bool:
+        """提交一个删除请求并等待所在批次完成
+        
+        Args:
+            file_key: 文件存储键名
+            
+        Returns:
+            bool: 是否删除成功
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(file_key, []).append(future)
+        
+        if len(self._pending) >= self._max_keys:
+            # 批次已满，立即在独立任务中发送，当前调用方被取消不会影响同批次的其他调用方
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            task = asyncio.create_task(self._run(self._take()))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_after_delay())
+        
+        return await future
+    
+    async def _flush_after_delay(self) -> None:
+        """等待超时后发送当前批次"""
+        await asyncio.sleep(self._max_delay)
+        self._timer = None
+        await self._run(self._take())
+    
+    def _take(self) -> dict[str, list[asyncio.Future]]:
+        """取出当前缓冲的请求"""
+        batch, self._pending = self._pending, {}
+        return batch
+    
+    async def _run(self, batch: dict[str, list[asyncio.Future]]) -> None:
+        """执行批量删除并通知等待方
+        
+        无论批量删除成功、失败还是被取消，都会通知批次内的所有等待方
+        
+        Args:
+            batch: 键名到等待方Future的映射
+        """
+        results: dict[str, bool] = {}
+        try:
+            results = await self._flush(list(batch))
+        except Exception as e:
+            logger.error(f"批量删除文件失败: {e}")
+        finally:
+            for file_key, futures in batch.items():
+                for future in futures:
+                    if not future.done():
+                        future.set_result(results.get(file_key, False))
+
+
 class R2StorageService:
     """Cloudflare R2存储服务
     
     提供文件上传、下载和管理功能
     """
     
+    # 文件名中需要移除的字符（保留字母、数字、下划线、点和连字符）
+    _UNSAFE_FILENAME_RE = re.compile(r"[^\w.-]")
+    
+    # 当前月份的键名前缀缓存: (年, 月, 前缀)
+    _prefix_cache: tuple[int, int, str] = (0, 0, "")
+    
     def __init__(self) -> None:
         """初始化R2存储服务
         
-        创建boto3客户端连接到Cloudflare R2
+        创建boto3客户端连接到Cloudflare R2，用于对象检查和删除；
+        预签名URL由本地SigV4签名器生成
         """
         try:
             self.s3_client = boto3.client(
@@ -43,11 +332,29 @@ class R2StorageService:
                 aws_access_key_id=settings.aws_access_key_id,
                 aws_secret_access_key=settings.aws_secret_access_key,
                 region_name=settings.region_name,
+                config=Config(
+                    max_pool_connections=64,  # 连接池大小，避免并发请求争用连接
+                    tcp_keepalive=True,  # 保持TCP连接，减少TLS握手
+                    retries={"mode": "standard", "max_attempts": 3},
+                    connect_timeout=2,  # 连接超时（秒）
+                    read_timeout=5,  # 读取超时（秒）
+                ),
             )
             
             # 从配置获取存储桶名称，如果未配置则使用默认值
             self.bucket_name = settings.r2_bucket_name or "taible-singapore"
             
+            self._signer = _SigV4Presigner(
+                endpoint_url=settings.endpoint_url,
+                bucket_name=self.bucket_name,
+                region_name=settings.region_name,
+                access_key_id=settings.aws_access_key_id,
+                secret_access_key=settings.aws_secret_access_key,
+            )
+            
+            # 单个删除请求经合并后批量发送
+            self._delete_batcher = _DeleteBatcher(self.delete_files)
+            
             logger.info(f"R2存储服务已初始化，端点: {settings.endpoint_url}")
             
         except Exception as e:
@@ -65,13 +372,17 @@ class R2StorageService:
         Returns:
             str: 文件存储键名
         """
-        now = datetime.utcnow()
-        unique_id = str(uuid.uuid4())
+        now = time.gmtime()
+        year, month, prefix = self._prefix_cache
+        if (now.tm_year, now.tm_mon) != (year, month):
+            # 月份变化时才重新生成前缀
+            prefix = f"uploads/{now.tm_year}/{now.tm_mon:02d}/"
+            self._prefix_cache = (now.tm_year, now.tm_mon, prefix)
         
         # 清理文件名，移除特殊字符
-        clean_filename = "".join(c for c in filename if c.isalnum() or c in ".-_")
+        clean_filename = self._UNSAFE_FILENAME_RE.sub("", filename)
         
-        return f"uploads/{now.year}/{now.month:02d}/{unique_id}_{clean_filename}"
+        return f"{prefix}{uuid.uuid4().hex}_{clean_filename}"
     
     async def create_file_record(
         self, 
@@ -91,17 +402,17 @@ class R2StorageService:
         """
         file_key = self._generate_file_key(file_data.filename)
         
-        file_record = FileRecord(
+        # INSERT ... RETURNING 一次往返拿到完整记录，无需提交后再refresh
+        statement = insert(FileRecord).values(
             filename=file_data.filename,
             file_key=file_key,
             file_size=file_data.file_size,
             content_type=file_data.content_type,
             upload_status="pending"
-        )
-        
-        db.add(file_record)
+        ).returning(FileRecord)
+        result = await db.execute(statement)
+        file_record = result.scalar_one()
         await db.commit()
-        await db.refresh(file_record)
         
         logger.info(f"文件记录已创建: {file_record.id} - {file_record.filename}")
         return file_record
@@ -113,6 +424,9 @@ class R2StorageService:
     ) -> Optional[FileRecord]:
         """获取文件记录
         
+        返回完整的ORM实体，供需要在会话内继续修改记录的调用方使用；
+        路由中的只读查询使用get_file_record_projection和get_file_download_info
+        
         Args:
             db: 数据库会话
             file_id: 文件记录ID
@@ -120,9 +434,53 @@ class R2StorageService:
         Returns:
             Optional[FileRecord]: 文件记录，不存在返回None
         """
-        statement = select(FileRecord).where(FileRecord.id == file_id)
+        # 主键查询走identity map，同一会话内重复查询不再访问数据库
+        return await db.get(FileRecord, file_id)
+    
+    async def get_file_record_projection(
+        self,
+        db: AsyncSession,
+        file_id: int
+    ) -> Optional[FileRecordRead]:
+        """按列查询文件记录并直接返回响应模型
+        
+        只查询FileRecordRead需要的列，不构建ORM实体
+        
+        Args:
+            db: 数据库会话
+            file_id: 文件记录ID
+            
+        Returns:
+            Optional[FileRecordRead]: 文件记录，不存在返回None
+        """
+        statement = select(*_FILE_RECORD_READ_COLUMNS).where(FileRecord.id == file_id)
         result = await db.execute(statement)
-        return result.scalar_one_or_none()
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return FileRecordRead.model_construct(**row._mapping)
+    
+    async def get_file_download_info(
+        self,
+        db: AsyncSession,
+        file_id: int
+    ) -> Optional[Row]:
+        """查询生成下载URL所需的字段
+        
+        Args:
+            db: 数据库会话
+            file_id: 文件记录ID
+            
+        Returns:
+            Optional[Row]: 包含file_key、filename、upload_status的行，不存在返回None
+        """
+        statement = select(
+            FileRecord.file_key,
+            FileRecord.filename,
+            FileRecord.upload_status,
+        ).where(FileRecord.id == file_id)
+        result = await db.execute(statement)
+        return result.one_or_none()
     
     async def update_file_record(
         self,
@@ -140,21 +498,28 @@ class R2StorageService:
         Returns:
             Optional[FileRecord]: 更新后的文件记录
         """
-        file_record = await self.get_file_record(db, file_id)
+        update_dict = update_data.model_dump(exclude_unset=True)
+        if not update_dict.get("updated_at"):
+            update_dict["updated_at"] = datetime.now(timezone.utc)
+        
+        # UPDATE ... RETURNING 一次往返完成更新并返回记录，记录不存在时无返回行
+        statement = (
+            update(FileRecord)
+            .where(FileRecord.id == file_id)
+            .values(**update_dict)
+            .returning(FileRecord)
+        )
+        result = await db.execute(statement)
+        file_record = result.scalar_one_or_none()
         if not file_record:
+            await db.rollback()
             return None
         
-        update_dict = update_data.model_dump(exclude_unset=True)
-        for field, value in update_dict.items():
-            setattr(file_record, field, value)
-        
         await db.commit()
-        await db.refresh(file_record)
         
         logger.info(f"文件记录已更新: {file_id}")
         return file_record
     
-    @cache_result("storage", ttl=300)  # 缓存5分钟
     async def generate_presigned_upload_url(
         self,
         file_key: str,
@@ -172,28 +537,21 @@ class R2StorageService:
             str: 预签名上传URL
             
         Raises:
-            ClientError: R2服务错误
             NoCredentialsError: 认证错误
+            ValueError: 未配置R2端点
         """
         try:
-            presigned_url = self.s3_client.generate_presigned_url(
-                'put_object',
-                Params={
-                    'Bucket': self.bucket_name,
-                    'Key': file_key,
-                    'ContentType': content_type,
-                },
-                ExpiresIn=expires_in
+            presigned_url = self._signer.presign(
+                "PUT", file_key, expires_in, content_type=content_type
             )
             
             logger.info(f"预签名上传URL已生成: {file_key}")
             return presigned_url
             
-        except (ClientError, NoCredentialsError) as e:
+        except (NoCredentialsError, ValueError) as e:
             logger.error(f"生成预签名URL失败: {e}")
             raise
     
-    @cache_result("storage", ttl=300)  # 缓存5分钟
     async def generate_presigned_download_url(
         self,
         file_key: str,
@@ -209,28 +567,25 @@ class R2StorageService:
             str: 预签名下载URL
             
         Raises:
-            ClientError: R2服务错误
+            NoCredentialsError: 认证错误
+            ValueError: 未配置R2端点
         """
         try:
-            presigned_url = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={
-                    'Bucket': self.bucket_name,
-                    'Key': file_key,
-                },
-                ExpiresIn=expires_in
-            )
+            presigned_url = self._signer.presign("GET", file_key, expires_in)
             
             logger.info(f"预签名下载URL已生成: {file_key}")
             return presigned_url
             
-        except ClientError as e:
+        except (NoCredentialsError, ValueError) as e:
             logger.error(f"生成预签名下载URL失败: {e}")
             raise
     
     async def check_file_exists(self, file_key: str) -> bool:
         """检查文件是否存在于R2存储中
         
+        仅用于明确需要确认存在性的场景；上传和下载前不需要调用，
+        文件元数据已在预签名响应和文件记录中返回
+        
         Args:
             file_key: 文件存储键名
             
@@ -238,7 +593,10 @@ class R2StorageService:
             bool: 文件是否存在
         """
         try:
-            self.s3_client.head_object(Bucket=self.bucket_name, Key=file_key)
+            # boto3为同步调用，在线程中执行避免阻塞事件循环
+            await asyncio.to_thread(
+                self.s3_client.head_object, Bucket=self.bucket_name, Key=file_key
+            )
             return True
         except ClientError as e:
             if e.response['Error']['Code'] == '404':
@@ -249,19 +607,54 @@ class R2StorageService:
     async def delete_file(self, file_key: str) -> bool:
         """删除R2存储中的文件
         
+        请求会与同一时间段内的其他删除合并为一次批量删除
+        
         Args:
             file_key: 文件存储键名
             
         Returns:
             bool: 是否删除成功
         """
-        try:
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=file_key)
-            logger.info(f"文件已删除: {file_key}")
-            return True
-        except ClientError as e:
-            logger.error(f"删除文件失败: {e}")
-            return False
+        return await self._delete_batcher.delete(file_key)
+    
+    async def delete_files(self, file_keys: list[str]) -> dict[str, bool]:
+        """批量删除R2存储中的文件
+        
+        按每批最多1000个键调用DeleteObjects，boto3调用在线程中执行
+        
+        Args:
+            file_keys: 文件存储键名列表
+            
+        Returns:
+            dict[str, bool]: 每个键是否删除成功
+        """
+        results: dict[str, bool] = {}
+        
+        for start in range(0, len(file_keys), _DELETE_BATCH_SIZE):
+            chunk = file_keys[start:start + _DELETE_BATCH_SIZE]
+            try:
+                response = await asyncio.to_thread(
+                    self.s3_client.delete_objects,
+                    Bucket=self.bucket_name,
+                    Delete={
+                        "Objects": [{"Key": key} for key in chunk],
+                        "Quiet": True,  # 只返回失败的键
+                    },
+                )
+            except ClientError as e:
+                logger.error(f"批量删除文件失败: {e}")
+                results.update(dict.fromkeys(chunk, False))
+                continue
+            
+            failed = {error["Key"] for error in response.get("Errors", [])}
+            for key in chunk:
+                results[key] = key not in failed
+            
+            if failed:
+                logger.error(f"部分文件删除失败: {sorted(failed)}")
+            logger.info(f"文件已批量删除: {len(chunk) - len(failed)}/{len(chunk)}")
+        
+        return results
     
     async def create_presigned_upload_request(
         self,
@@ -296,12 +689,69 @@ class R2StorageService:
             expires_in
         )
         
-        return PresignedUrlResponse(
+        return PresignedUrlResponse.model_construct(
             upload_url=upload_url,
             file_key=file_record.file_key,
             expires_in=expires_in,
-            file_record_id=file_record.id
+            file_record_id=file_record.id,
+            content_type=file_record.content_type,
+            file_size=file_record.file_size
         )
+    
+    async def create_presigned_upload_requests(
+        self,
+        db: AsyncSession,
+        request: PresignedUrlBatchRequest
+    ) -> list[PresignedUrlResponse]:
+        """批量创建预签名上传请求
+        
+        所有文件记录一次提交，预签名URL共用同一签名时间批量生成
+        
+        Args:
+            db: 数据库会话
+            request: 批量预签名URL请求
+            
+        Returns:
+            list[PresignedUrlResponse]: 与请求顺序一致的预签名URL响应
+        """
+        file_records = [
+            FileRecord(
+                filename=item.filename,
+                file_key=self._generate_file_key(item.filename),
+                file_size=item.file_size,
+                content_type=item.content_type,
+                upload_status="pending"
+            )
+            for item in request.files
+        ]
+        
+        # flush时INSERT会回填主键，其余字段均在本地生成，无需逐个refresh
+        db.add_all(file_records)
+        await db.commit()
+        
+        expires_in = 3600  # 1小时过期
+        try:
+            upload_urls = self._signer.presign_many_puts(
+                [(record.file_key, record.content_type) for record in file_records],
+                expires_in
+            )
+        except (NoCredentialsError, ValueError) as e:
+            logger.error(f"批量生成预签名URL失败: {e}")
+            raise
+        
+        logger.info(f"批量预签名上传URL已生成: {len(file_records)}个文件")
+        
+        return [
+            PresignedUrlResponse.model_construct(
+                upload_url=upload_url,
+                file_key=record.file_key,
+                expires_in=expires_in,
+                file_record_id=record.id,
+                content_type=record.content_type,
+                file_size=record.file_size
+            )
+            for record, upload_url in zip(file_records, upload_urls)
+        ]
 
 
 # 全局存储服务实例
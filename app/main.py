@@ -4,14 +4,18 @@
 """
 
 import asyncio
+import time
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import AsyncGenerator
+from http import HTTPStatus
+from typing import Any, AsyncGenerator
 
-from fastapi import FastAPI, HTTPException, Request
+import orjson
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from loguru import logger
+from sqlalchemy import text
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.core.config import settings
 from app.core.database import db_manager
@@ -44,6 +48,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         else:
             logger.warning("Redis未配置，跳过Redis相关操作")
         
+        # 存储配置启动后不再变化，健康检查直接读取结果
+        app.state.storage_healthy = _storage_configured()
+        if not app.state.storage_healthy:
+            logger.warning("存储服务配置不完整")
+        
         # 运行数据库迁移（仅在数据库已配置时）
         if db_manager.engine:
             try:
@@ -104,52 +113,145 @@ app.add_middleware(
         "http://127.0.0.1:8000",
     ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # 明确列出方法和请求头，预检响应使用预先拼好的头部，不再逐个回显请求头
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With"],
 )
 
 
+# 默认错误详情（如未知路由的"Not Found"）对应的响应体缓存
+_DEFAULT_ERROR_BODIES: dict[int, bytes] = {}
+
+# 标准状态码到默认状态描述的映射，非标准状态码不在其中
+_STATUS_PHRASES: dict[int, str] = {status.value: status.phrase for status in HTTPStatus}
+
+
+def _error_content(message: Any, code: int, error_type: str) -> dict[str, Any]:
+    """构建错误响应内容
+    
+    字段与APIResponse一致，直接构造字典，跳过Pydantic模型
+    
+    Args:
+        message: 错误消息
+        code: HTTP状态码
+        error_type: 错误类型
+        
+    Returns:
+        dict[str, Any]: 错误响应内容
+    """
+    return {
+        "success": False,
+        "data": None,
+        "message": message,
+        "code": code,
+        "error_type": error_type,
+    }
+
+
 # 全局异常处理器
-@app.exception_handler(HTTPException)
-async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
+# 注册在Starlette的HTTPException上，未知路由等框架抛出的404也使用统一格式
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(
+    request: Request, exc: StarletteHTTPException
+) -> Response:
     """HTTP异常处理器
     
-    将HTTPException转换为统一的API响应格式
+    将HTTPException转换为统一的API响应格式，
+    使用默认状态描述且没有附加响应头的错误直接返回缓存的响应体
     """
     logger.warning(f"HTTP异常: {exc.status_code} - {exc.detail}")
     
-    return JSONResponse(
+    if not exc.headers and exc.detail == _STATUS_PHRASES.get(exc.status_code):
+        body = _DEFAULT_ERROR_BODIES.get(exc.status_code)
+        if body is None:
+            body = orjson.dumps(
+                _error_content(exc.detail, exc.status_code, "HTTPException")
+            )
+            _DEFAULT_ERROR_BODIES[exc.status_code] = body
+        return Response(
+            content=body,
+            status_code=exc.status_code,
+            media_type="application/json"
+        )
+    
+    return Response(
+        content=orjson.dumps(
+            _error_content(exc.detail, exc.status_code, "HTTPException")
+        ),
         status_code=exc.status_code,
-        content=APIResponse(
-            success=False,
-            data=None,
-            message=exc.detail,
-            code=exc.status_code,
-            error_type="HTTPException"
-        ).model_dump()
+        headers=exc.headers,
+        media_type="application/json"
     )
 
 
 @app.exception_handler(Exception)
-async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def general_exception_handler(request: Request, exc: Exception) -> Response:
     """通用异常处理器
     
     处理未捕获的异常，避免暴露内部错误信息
     """
     logger.error(f"未处理的异常: {type(exc).__name__}: {str(exc)}")
     
-    return JSONResponse(
+    return Response(
+        content=orjson.dumps(
+            _error_content(
+                "服务器内部错误" if not settings.debug else str(exc),
+                500,
+                type(exc).__name__
+            )
+        ),
         status_code=500,
-        content=APIResponse(
-            success=False,
-            data=None,
-            message="服务器内部错误" if not settings.debug else str(exc),
-            code=500,
-            error_type=type(exc).__name__
-        ).model_dump()
+        media_type="application/json"
     )
 
 
+# 健康检查子探针
+async def _probe_db() -> bool:
+    """检查数据库连接
+    
+    Returns:
+        bool: 数据库是否可用
+    """
+    if not db_manager.async_session:
+        logger.info("数据库未配置，跳过健康检查")
+        return False
+    
+    # 直接使用会话上下文，超时取消时会话立即关闭
+    async with db_manager.async_session() as session:
+        await session.execute(text("SELECT 1"))
+    return True
+
+
+async def _probe_redis() -> bool:
+    """检查Redis连接
+    
+    Returns:
+        bool: Redis是否可用
+    """
+    if not redis_manager.redis_client:
+        logger.info("Redis未配置，跳过健康检查")
+        return False
+    
+    return await redis_manager.ping()
+
+
+def _storage_configured() -> bool:
+    """检查存储服务（简单检查配置是否完整）
+    
+    配置在启动后不会变化，只需在启动时计算一次
+    
+    Returns:
+        bool: 存储配置是否完整
+    """
+    r2_config = settings.r2_config
+    return bool(r2_config and all([
+        r2_config.get('aws_access_key_id'),
+        r2_config.get('aws_secret_access_key'),
+        settings.r2_bucket_name,
+        r2_config.get('endpoint_url')
+    ]))
+
+
 # 健康检查端点
 @app.get(
     "/health",
@@ -157,61 +259,48 @@ async def general_exception_handler(request: Request, exc: Exception) -> JSONRes
     summary="健康检查",
     description="检查应用和各个服务的健康状态"
 )
-async def health_check() -> APIResponse[HealthCheckResponse]:
+async def health_check(request: Request) -> APIResponse[HealthCheckResponse]:
     """健康检查端点
     
-    检查数据库、Redis和存储服务的连接状态
+    并发检查数据库和Redis的连接状态，每项检查单独限时，
+    总耗时取决于最慢的一项而不是各项之和；存储服务读取启动时的配置检查结果
+    
+    Args:
+        request: 请求对象
     
     Returns:
         APIResponse[HealthCheckResponse]: 健康检查结果
     """
-    # 检查数据库连接
-    database_healthy = False
-    try:
-        if db_manager.async_session:
-            from sqlalchemy import text
-            async for session in db_manager.get_session():
-                await session.execute(text("SELECT 1"))
-                database_healthy = True
-                break  # 只需要一次检查
-        else:
-            logger.info("数据库未配置，跳过健康检查")
-    except Exception as e:
-        logger.error(f"数据库健康检查失败: {e}")
+    results = await asyncio.gather(
+        asyncio.wait_for(_probe_db(), timeout=1.0),
+        asyncio.wait_for(_probe_redis(), timeout=1.0),
+        return_exceptions=True
+    )
     
-    # 检查Redis连接
-    redis_healthy = False
-    try:
-        if redis_manager.redis_client:
-            await redis_manager.ping()
-            redis_healthy = True
-        else:
-            logger.info("Redis未配置，跳过健康检查")
-    except Exception as e:
-        logger.error(f"Redis健康检查失败: {e}")
+    # 探针异常或超时均视为不健康
+    for name, result in zip(("数据库", "Redis"), results):
+        if isinstance(result, BaseException):
+            logger.error(f"{name}健康检查失败: {type(result).__name__}: {result}")
+    database_healthy, redis_healthy = (result is True for result in results)
     
-    # 检查存储服务（简单检查配置是否完整）
-    r2_config = settings.r2_config
-    storage_healthy = bool(r2_config and all([
-        r2_config.get('aws_access_key_id'),
-        r2_config.get('aws_secret_access_key'),
-        settings.r2_bucket_name,
-        r2_config.get('endpoint_url')
-    ]))
+    # 存储配置状态在启动时已计算，未经过lifespan启动时（如测试）现场计算
+    storage_healthy = getattr(request.app.state, "storage_healthy", None)
+    if storage_healthy is None:
+        storage_healthy = _storage_configured()
     
     # 整体健康状态
     overall_healthy = database_healthy and redis_healthy and storage_healthy
     
-    health_data = HealthCheckResponse(
+    health_data = HealthCheckResponse.model_construct(
         status="healthy" if overall_healthy else "unhealthy",
-        timestamp=datetime.utcnow().isoformat(),
+        timestamp=time.time_ns() // 1_000_000,
         version=settings.app_version,
         database=database_healthy,
         redis=redis_healthy,
         storage=storage_healthy
     )
     
-    return APIResponse(
+    return APIResponse.model_construct(
         success=overall_healthy,
         data=health_data,
         message="健康检查完成",
@@ -234,8 +323,7 @@ async def root() -> APIResponse[dict]:
     Returns:
         APIResponse[dict]: API信息
     """
-    return APIResponse(
-        success=True,
+    return APIResponse.ok(
         data={
             "name": settings.app_name,
             "version": settings.app_version,
@@ -243,8 +331,7 @@ async def root() -> APIResponse[dict]:
             "docs_url": "/docs",
             "health_url": "/health"
         },
-        message="欢迎使用文件存储API",
-        code=200
+        message="欢迎使用文件存储API"
     )
 
 
@@ -257,6 +344,8 @@ app.include_router(
 
 
 if __name__ == "__main__":
+    import sys
+    
     import uvicorn
     
     # 配置日志
@@ -271,10 +360,13 @@ if __name__ == "__main__":
     
     logger.info(f"启动开发服务器: {settings.app_name} v{settings.app_version}")
     
+    # uvloop与httptools不支持Windows，其他平台使用C实现的事件循环和HTTP解析器
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
         reload=settings.debug,
-        log_level="info" if not settings.debug else "debug"
+        log_level="info" if not settings.debug else "debug",
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="h11" if sys.platform == "win32" else "httptools"
     )
\ No newline at end of file
@@ -3,11 +3,39 @@
 定义通用的API响应格式和数据验证模式
 """
 
-from typing import Generic, TypeVar, Optional, Any
-from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, Generic, Iterable, TypeVar, Optional, Any
+from pydantic import BaseModel, ConfigDict, Field
 
 
 T = TypeVar('T')
+M = TypeVar('M', bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def build_mapper(schema_cls: type[M]) -> Callable[[Any], M]:
+    """构建从ORM对象到响应模型的转换函数
+    
+    按响应模型的字段一次性生成属性读取器，转换时整体读取所需属性后
+    直接构造模型，跳过from_attributes的逐字段反射与校验。
+    结果按模型类缓存，仅适用于来自数据库等可信来源的数据
+    
+    Args:
+        schema_cls: 响应模型类
+        
+    Returns:
+        Callable[[Any], M]: 转换函数
+    """
+    names = tuple(schema_cls.model_fields)
+    getter = attrgetter(*names)
+    construct = schema_cls.model_construct
+    
+    if len(names) == 1:
+        name = names[0]
+        return lambda row: construct(**{name: getter(row)})
+    return lambda row: construct(**dict(zip(names, getter(row))))
 
 
 class APIResponse(BaseModel, Generic[T]):
@@ -15,17 +43,39 @@ class APIResponse(BaseModel, Generic[T]):
     
     提供标准化的API响应结构，包含成功状态、数据、消息和状态码
     """
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     success: bool = Field(description="操作是否成功")
     data: Optional[T] = Field(default=None, description="响应数据")
     message: str = Field(description="响应消息")
     code: int = Field(description="HTTP状态码")
     error_type: Optional[str] = Field(default=None, description="错误类型")
     
-    class Config:
-        """Pydantic配置"""
-        json_encoders = {
-            # 处理特殊类型的JSON序列化
-        }
+    @classmethod
+    def ok(
+        cls,
+        data: Optional[T] = None,
+        message: str = "操作成功",
+        code: int = 200
+    ) -> "APIResponse[T]":
+        """创建成功响应
+        
+        响应字段均由服务端生成，无需校验，直接构造
+        
+        Args:
+            data: 响应数据
+            message: 响应消息
+            code: HTTP状态码
+            
+        Returns:
+            APIResponse[T]: 成功响应对象
+        """
+        return cls.model_construct(
+            success=True,
+            data=data,
+            message=message,
+            code=code
+        )
 
 
 class PaginationParams(BaseModel):
@@ -47,6 +97,8 @@ class PaginationResponse(BaseModel, Generic[T]):
     
     包含分页数据和元信息
     """
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     items: list[T] = Field(description="数据列表")
     total: int = Field(description="总数量")
     page: int = Field(description="当前页码")
@@ -56,10 +108,11 @@ class PaginationResponse(BaseModel, Generic[T]):
     @classmethod
     def create(
         cls,
-        items: list[T],
+        items: Iterable[Any],
         total: int,
         page: int,
-        size: int
+        size: int,
+        mapper: Optional[Callable[[Any], T]] = None
     ) -> "PaginationResponse[T]":
         """创建分页响应
         
@@ -68,12 +121,18 @@ class PaginationResponse(BaseModel, Generic[T]):
             total: 总数量
             page: 当前页码
             size: 每页数量
+            mapper: 可选的转换函数（如build_mapper生成的），用于将ORM对象批量转换为响应模型
             
         Returns:
             PaginationResponse[T]: 分页响应对象
         """
-        pages = (total + size - 1) // size  # 向上取整
-        return cls(
+        if mapper is not None:
+            items = list(map(mapper, items))
+        elif not isinstance(items, list):
+            items = list(items)
+        pages = -(-total // size)  # 向上取整
+        # 分页元信息由服务端计算，直接构造，跳过逐字段校验
+        return cls.model_construct(
             items=items,
             total=total,
             page=page,
@@ -87,9 +146,25 @@ class HealthCheckResponse(BaseModel):
     
     用于系统健康状态检查
     """
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     status: str = Field(description="服务状态")
-    timestamp: str = Field(description="检查时间")
+    timestamp: int = Field(description="检查时间（Unix毫秒时间戳）")
     version: str = Field(description="应用版本")
     database: bool = Field(description="数据库连接状态")
     redis: bool = Field(description="Redis连接状态")
-    storage: bool = Field(description="存储服务状态")
\ No newline at end of file
+    storage: bool = Field(description="存储服务状态")
+
+
+def to_iso(ts_ms: int) -> str:
+    """将毫秒时间戳转换为ISO 8601格式的UTC时间字符串
+    
+    便于在日志等需要可读时间的场景中展示响应中的时间戳
+    
+    Args:
+        ts_ms: Unix毫秒时间戳
+        
+    Returns:
+        str: ISO 8601格式的UTC时间
+    """
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).isoformat()
@@ -0,0 +1,101 @@
+"""删除请求合并器测试"""
+
+import asyncio
+
+import pytest
+
+from app.features.storage.service import _DeleteBatcher
+
+
+class _RecordingFlush:
+    """记录每次批量删除的键，并可指定延迟或异常"""
+    
+    def __init__(self, delay: float = 0.0, error: Exception | None = None) -> None:
+        self.delay = delay
+        self.error = error
+        self.calls: list[list[str]] = []
+    
+    async def __call__(self, keys: list[str]) -> dict[str, bool]:
+        self.calls.append(keys)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {key: True for key in keys}
+
+
+async def test_requests_within_max_delay_are_coalesced() -> None:
+    flush = _RecordingFlush()
+    batcher = _DeleteBatcher(flush, max_keys=10, max_delay=0.05)
+    
+    results = await asyncio.gather(*(batcher.delete(f"k{i}") for i in range(5)))
+    
+    assert results == [True] * 5
+    assert flush.calls == [[f"k{i}" for i in range(5)]]
+
+
+async def test_duplicate_keys_share_one_delete() -> None:
+    flush = _RecordingFlush()
+    batcher = _DeleteBatcher(flush, max_keys=10, max_delay=0.01)
+    
+    results = await asyncio.gather(batcher.delete("k"), batcher.delete("k"))
+    
+    assert results == [True, True]
+    assert flush.calls == [["k"]]
+
+
+async def test_batch_is_split_at_max_keys() -> None:
+    flush = _RecordingFlush()
+    batcher = _DeleteBatcher(flush, max_keys=3, max_delay=0.05)
+    
+    results = await asyncio.gather(*(batcher.delete(f"k{i}") for i in range(7)))
+    
+    assert results == [True] * 7
+    assert flush.calls == [["k0", "k1", "k2"], ["k3", "k4", "k5"], ["k6"]]
+
+
+async def test_cancelling_the_caller_that_fills_a_batch_does_not_stall_peers() -> None:
+    flush = _RecordingFlush(delay=0.1)
+    batcher = _DeleteBatcher(flush, max_keys=3, max_delay=10)
+    
+    peers = [asyncio.create_task(batcher.delete(key)) for key in ("a", "b")]
+    await asyncio.sleep(0)
+    filler = asyncio.create_task(batcher.delete("c"))
+    await asyncio.sleep(0.02)  # 批量删除进行中
+    filler.cancel()
+    
+    results = await asyncio.wait_for(asyncio.gather(*peers), timeout=1)
+    
+    assert results == [True, True]
+    assert flush.calls == [["a", "b", "c"]]
+    with pytest.raises(asyncio.CancelledError):
+        await filler
+
+
+async def test_cancelled_timer_flush_resolves_waiters() -> None:
+    flush = _RecordingFlush(delay=10)
+    batcher = _DeleteBatcher(flush, max_keys=10, max_delay=0.01)
+    
+    waiter = asyncio.create_task(batcher.delete("k"))
+    await asyncio.sleep(0.05)  # 定时任务已进入批量删除
+    timer_tasks = [
+        task for task in asyncio.all_tasks()
+        if task.get_coro().__qualname__ == "_DeleteBatcher._flush_after_delay"
+    ]
+    assert len(timer_tasks) == 1
+    timer_tasks[0].cancel()
+    
+    assert await asyncio.wait_for(waiter, timeout=1) is False
+
+
+async def test_failing_flush_resolves_every_future_to_false() -> None:
+    flush = _RecordingFlush(error=RuntimeError("boom"))
+    batcher = _DeleteBatcher(flush, max_keys=2, max_delay=0.01)
+    
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.delete(f"k{i}") for i in range(3))),
+        timeout=1,
+    )
+    
+    assert results == [False, False, False]
+    assert flush.calls == [["k0", "k1"], ["k2"]]
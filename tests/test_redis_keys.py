@@ -0,0 +1,20 @@
+"""缓存键名构建测试"""
+
+import hashlib
+
+from app.core.redis import redis_manager
+
+
+def test_short_ascii_args_are_embedded() -> None:
+    assert redis_manager._build_key("storage", "get", 1, "abc") == "taible:storage:get:1:abc"
+
+
+def test_hashed_key_differs_from_raw_digest_argument() -> None:
+    long_arg = "文件名"
+    digest = hashlib.blake2b(long_arg.encode(), digest_size=4).hexdigest()
+    
+    hashed = redis_manager._build_key("storage", "get", long_arg)
+    
+    assert hashed == f"taible:storage:get:#{digest}"
+    assert redis_manager._build_key("storage", "get", digest) != hashed
+    assert redis_manager._build_key("storage", "get", f"#{digest}") != hashed
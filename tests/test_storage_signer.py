@@ -0,0 +1,116 @@
+"""SigV4预签名器测试
+
+与boto3生成的预签名URL逐字节比较
+"""
+
+import calendar
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import boto3
+import pytest
+from botocore.config import Config
+
+from app.features.storage.service import _SigV4Presigner
+
+
+BUCKET = "test-bucket"
+REGION = "auto"
+ACCESS_KEY_ID = "test-access-key"
+SECRET_ACCESS_KEY = "test-secret-key"
+EXPIRES_IN = 3600
+
+
+def _boto3_client(endpoint_url: str):
+    """创建与R2服务相同配置的boto3客户端"""
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=ACCESS_KEY_ID,
+        aws_secret_access_key=SECRET_ACCESS_KEY,
+        region_name=REGION,
+        config=Config(signature_version="s3v4"),
+    )
+
+
+def _signed_at(url: str) -> float:
+    """取出URL中的X-Amz-Date，转换为Unix时间戳"""
+    amz_date = parse_qs(urlsplit(url).query)["X-Amz-Date"][0]
+    return calendar.timegm(time.strptime(amz_date, "%Y%m%dT%H%M%SZ"))
+
+
+def _presigner(endpoint_url: str) -> _SigV4Presigner:
+    return _SigV4Presigner(
+        endpoint_url=endpoint_url,
+        bucket_name=BUCKET,
+        region_name=REGION,
+        access_key_id=ACCESS_KEY_ID,
+        secret_access_key=SECRET_ACCESS_KEY,
+    )
+
+
+ENDPOINTS = [
+    "https://account.r2.cloudflarestorage.com",
+    "https://account.r2.cloudflarestorage.com:443",
+    "http://localhost:9000",
+    "http://localhost:80",
+]
+
+FILE_KEYS = [
+    "uploads/2026/10/abc_photo.png",
+    "uploads/2026/10/abc_照片 (1).png",
+    "uploads/a+b=c&d~e/f%g.txt",
+]
+
+
+@pytest.mark.parametrize("endpoint_url", ENDPOINTS)
+@pytest.mark.parametrize("file_key", FILE_KEYS)
+def test_presign_get_matches_boto3(endpoint_url: str, file_key: str) -> None:
+    expected = _boto3_client(endpoint_url).generate_presigned_url(
+        "get_object",
+        Params={"Bucket": BUCKET, "Key": file_key},
+        ExpiresIn=EXPIRES_IN,
+    )
+    
+    actual = _presigner(endpoint_url).presign(
+        "GET", file_key, EXPIRES_IN, now=_signed_at(expected)
+    )
+    
+    assert actual == expected
+
+
+@pytest.mark.parametrize("endpoint_url", ENDPOINTS)
+@pytest.mark.parametrize("file_key", FILE_KEYS)
+@pytest.mark.parametrize(
+    "content_type",
+    [
+        "image/png",
+        " image/png ",
+        "text/plain;  charset=utf-8",
+        "text/plain;\tcharset=utf-8",
+    ],
+)
+def test_presign_put_matches_boto3(
+    endpoint_url: str, file_key: str, content_type: str
+) -> None:
+    expected = _boto3_client(endpoint_url).generate_presigned_url(
+        "put_object",
+        Params={"Bucket": BUCKET, "Key": file_key, "ContentType": content_type},
+        ExpiresIn=EXPIRES_IN,
+    )
+    
+    actual = _presigner(endpoint_url).presign(
+        "PUT", file_key, EXPIRES_IN, content_type=content_type, now=_signed_at(expected)
+    )
+    
+    assert actual == expected
+
+
+def test_presign_many_puts_shares_one_timestamp() -> None:
+    presigner = _presigner(ENDPOINTS[0])
+    items = [("uploads/a.png", "image/png"), ("uploads/b.txt", "text/plain")]
+    
+    urls = presigner.presign_many_puts(items, EXPIRES_IN)
+    
+    assert len(urls) == 2
+    assert len({_signed_at(url) for url in urls}) == 1